@@ -1,36 +1,81 @@
 from Module import *
 from Device_Generator import Topo, Layout
+import logging
+
+logger = logging.getLogger(__name__)
+
+# log the instances of each group while generating
+DEBUG = False
+
+# group type -> label for the debug output
+GROUP_LABEL = {"nmos": "NMOS", "pmos": "PMOS", "subckt": "Subckt"}
+
+# group type -> topology generator, called with (tech, circuit, group)
+TOPO_HANDLERS = {
+    "nmos": Topo.MOSFET,
+    "pmos": Topo.MOSFET,
+}
+
+# group type -> layout generator, called with (tech, circuit, name, group)
+LAYOUT_HANDLERS = {
+    "nmos":   lambda tech, circuit, name, group: Layout.MOSFET(tech, circuit[name], group),
+    "pmos":   lambda tech, circuit, name, group: Layout.MOSFET(tech, circuit[name], group),
+    "subckt": lambda tech, circuit, name, group: Layout.SUBCKT(circuit, name, group),
+}
 
 def topology_generation(tech: Tech, circuit: Circuit) -> None:
     for group_id in circuit.group:
         curr_group = circuit.group[group_id]
-        
-        if curr_group.type == "nmos":
-            print("NMOS", [inst.id for inst in curr_group.inst])
-            Topo.MOSFET(tech, circuit, curr_group)
-            print()
 
-        elif curr_group.type == "pmos":
-            print("PMOS", [inst.id for inst in curr_group.inst])
-            Topo.MOSFET(tech, circuit, curr_group)
-            print()
+        handler = TOPO_HANDLERS.get(curr_group.type)
+        if handler:
+            if DEBUG:
+                logger.debug("%s %s", GROUP_LABEL[curr_group.type], [inst.id for inst in curr_group.inst])
+
+            handler(tech, circuit, curr_group)
+
 
+def _mosfet_layout(args: tuple) -> tuple:
+    """
+    @brief: generate the layout of a MOSFET group in a worker process
+    @param args: technology and group
+    @return: the shape, pin and boundary of the group
+    """
+    tech, group = args
+    # the MOSFET layout only reads the technology and its own group
+    Layout.MOSFET(tech, None, group)
+    return group.shape, group.pin, group.boundary
 
-def layout_generation(tech: Tech, circuit: dict, name: str) -> None:
+
+def layout_generation(tech: Tech, circuit: dict, name: str, n_workers: int = 1) -> None:
+    """
+    @brief: generate the layout of each group of the circuit
+    @param n_workers: number of processes for the MOSFET groups (1 generates them in this process)
+    """
+    mosfet_groups = []
     for group_id in circuit[name].group:
         curr_group = circuit[name].group[group_id]
-        
-        if curr_group.type == "nmos":
-            print("NMOS", [inst.id for inst in curr_group.inst])
-            Layout.MOSFET(tech, circuit[name], curr_group)
-            print()
-
-        elif curr_group.type == "pmos":
-            print("PMOS", [inst.id for inst in curr_group.inst])
-            Layout.MOSFET(tech, circuit[name], curr_group)
-            print()
-
-        elif curr_group.type == "subckt":
-            print("Subckt", [inst.id for inst in curr_group.inst])
-            Layout.SUBCKT(circuit, name, curr_group)
-            print()
\ No newline at end of file
+
+        handler = LAYOUT_HANDLERS.get(curr_group.type)
+        if handler:
+            if DEBUG:
+                logger.debug("%s %s", GROUP_LABEL[curr_group.type], [inst.id for inst in curr_group.inst])
+
+            # MOSFET groups are independent of each other, generate them in the worker processes
+            if n_workers > 1 and curr_group.type in ("nmos", "pmos"):
+                mosfet_groups.append(curr_group)
+            else:
+                handler(tech, circuit, name, curr_group)
+
+    if mosfet_groups:
+        # imported on first use, multiprocessing is only loaded when the pool is needed
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = executor.map(_mosfet_layout, [(tech, group) for group in mosfet_groups])
+
+            # copy the layout back to the groups of this process
+            for group, (shape, pin, boundary) in zip(mosfet_groups, results):
+                group.shape = shape
+                group.pin = pin
+                group.boundary = boundary
@@ -5,53 +5,86 @@ class EulerEdge:
     """
     @brief: class for Edge in EulerGraph
     """
+    __slots__ = ("u", "v", "e", "u_net", "v_net", "e_t", "e_rev", "e_str", "mirror", "slot")
+
     def __init__(self, u: Node, v: Node, e: list): 
         self.u = u
         self.v = v
         self.e = e
 
+        # cached for the graph walks
+        self.u_net = u.net
+        self.v_net = v.net
+        self.e_t   = tuple(e)
+        self.e_rev = self.e_t[::-1]
+        self.e_str = ",".join(x.net for x in e)
+
+        self.mirror = None      # twin edge stored in the adjacency of the other node
+        self.slot = -1          # half-edge index in the CSR arrays of the graph
+
 class EulerGraph:
     """
     @brief: class for Graph that contains Eulerian Path
     """
     def __init__(self):
         self.graph = defaultdict(list)
+        self.nedges = 0     # number of edges in the graph
 
-    def add_edge(self, u: Node, v: Node, e: list, index: int = -1) -> None:
+        # compressed sparse row (CSR) arrays, built by freeze()
+        self.nodes = []         # node id -> net
+        self.node_id = {}       # net -> node id
+        self.row_ptr = []       # half-edges of node i are in [row_ptr[i], row_ptr[i+1])
+        self.col_idx = []       # half-edge -> ending node id
+        self.edge_data = []     # half-edge -> EulerEdge
+        self.edge_twin = []     # half-edge -> half-edge of the twin edge
+
+    def add_edge(self, u: Node, v: Node, e: list) -> None:
         """
         @brief: add edge to the graph
         @param u: starting node (diff)
         @param v: ending node (diff)
         @param e: edge (gate)
         """
-        if index == -1:
-            self.graph[u.net].append(EulerEdge(u, v, e))
-            self.graph[v.net].append(EulerEdge(v, u, e[::-1]))
-        else:
-            self.graph[u.net].insert(index, EulerEdge(u, v, e))
-            self.graph[v.net].insert(index, EulerEdge(v, u, e[::-1]))
+        self.add_edge_pair(u, v, e)
+
+    def add_edge_pair(self, u: Node, v: Node, e: list) -> None:
+        """
+        @brief: append the edge and its twin to the end of the adjacency of u and v
+        @param u: starting node (diff)
+        @param v: ending node (diff)
+        @param e: edge (gate)
+        """
+        fwd = EulerEdge(u, v, e)
+        rev = EulerEdge(v, u, fwd.e_rev)    # the reversed tuple is shared, tuple() does not copy it
+        fwd.mirror = rev
+        rev.mirror = fwd
+
+        self.graph[u.net].append(fwd)
+        self.graph[v.net].append(rev)
+        self.nedges += 1
 
-    def remove_edge(self, u: str, v: str, e: list=None) -> int:
+    def freeze(self) -> None:
         """
-        @brief: remove edge from the graph
-        @param u: starting node
-        @param v: ending node
-        @param e: edge
-        @return i: index of the edge
+        @brief: build the CSR arrays of the graph with integer node ids
         """
-        for i, edge in enumerate(self.graph[u]):
-            adj = edge.v.net if edge.u.net == u else edge.u.net     # get the adjacent node
-            if adj == v and edge.e == e:
-                del self.graph[u][i]
-                break
+        self.nodes = list(self.graph)
+        self.node_id = {net: i for i, net in enumerate(self.nodes)}
 
-        for i, edge in enumerate(self.graph[v]):
-            adj = edge.u.net if edge.v.net == v else edge.v.net     # get the adjacent node
-            if adj == u and edge.e[::-1] == e:
-                del self.graph[v][i]
-                break
+        node_id = self.node_id
+        row_ptr = [0]
+        col_idx = []
+        edge_data = []
+        for net in self.nodes:
+            for edge in self.graph[net]:
+                edge.slot = len(edge_data)
+                col_idx.append(node_id[edge.v_net])
+                edge_data.append(edge)
+            row_ptr.append(len(edge_data))
 
-        return i
+        self.row_ptr = row_ptr
+        self.col_idx = col_idx
+        self.edge_data = edge_data
+        self.edge_twin = [edge.mirror.slot for edge in edge_data]
     
 def print_graph(graph: EulerGraph) -> None:
     """
@@ -61,10 +94,5 @@ def print_graph(graph: EulerGraph) -> None:
     for node in graph.graph:
         print(node, end=": ")
         for edge in graph.graph[node]:
-            if edge.u.net == node:
-                edge_info = [x.net for x in edge.e]
-                print(edge.v.net+"("+str(*edge_info)+")", end=" ")
-            else:
-                edge_info = [x.net for x in edge.e]
-                print(edge.u.net+"("+str(*edge_info)+")", end=" ")
-        print()
\ No newline at end of file
+            print(f"{edge.v_net}({edge.e_str})", end=" ")
+        print()
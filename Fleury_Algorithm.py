@@ -1,134 +1,111 @@
 from Device_Generator.EulerGraph import *
-from Module.DB import Node
 
 class Fleury_Algorithm:
     def __init__(self, graph: EulerGraph, verbose: bool=False):
         self.graph = graph
         self.verbose = verbose
 
-    def initial_node(self) -> str:
+    def hierholzer(self, finger: bool=True) -> list:
         """
-        @brief: choose the starting node for the circuit
-        @return: the starting node
-        """ 
-        # find the node with odd degree
-        for node in self.graph.graph:
-            if len(self.graph.graph[node]) % 2 == 1:
-                # get the node from the graph
-                init_node = self.graph.graph[node][0].u if self.graph.graph[node][0].u.net == node else self.graph.graph[node][0].v
-
-                return init_node
-            
-        # if there is no node with odd degree, choose the first node
-        node = list(self.graph.graph.keys())[0]
-        init_node = self.graph.graph[node][0].u if self.graph.graph[node][0].u.net == node else self.graph.graph[node][0].v
-        return init_node
-    
-    def is_bridge(self, edge: EulerEdge) -> bool:
-        """
-        @brief: check if the edge is a bridge
-        @param from_node: the starting node
-        @param to_node: the ending node
-        @return: True if the edge is a bridge, False otherwise
-        """
-        from_node = edge.u.net
-        to_node   = edge.v.net
-        edge_info = edge.e
-
-        # remove the edge
-        index = self.graph.remove_edge(from_node, to_node, edge_info)
-
-        # run depth first search to check if the edge is a bridge
-        visited = []
-        self.dfs_visit(from_node, visited)
-
-        # add the edge back
-        self.graph.add_edge(edge.u, edge.v, edge.e, index)
-
-        # if the edge is a bridge, the visited list will not contain the to_node
-        return False if to_node in visited else True
-    
-
-    def dfs_visit(self, from_node: str, visited: list) -> None:
-        """
-        @brief: run depth first search to check if the graph is connected
-        @param from_node: the starting node
-        @param visited: the list of visited nodes
-        """
-        visited.append(from_node)
-        for edge in self.graph.graph[from_node]:
-            to_node = edge.v.net if edge.u.net == from_node else edge.u.net
-            if to_node not in visited:
-                self.dfs_visit(to_node, visited)
-
-
-    def dfs_order(self, from_node: str, circuit: list, finger: bool=True) -> None:
-        """
-        @brief: run depth first search to find the circuit order
-        @param from_node: the starting node
-        @param circuit: the circuit order
+        @brief: run Hierholzer's algorithm to find the circuit order
         @param finger: True if the circuit is a finger, False otherwise
+        @return: the circuit order
         """
-        for edge in self.graph.graph[from_node]:
-            to_node = edge.v if edge.u.net == from_node else edge.u
-            fr_node = edge.u if edge.u.net == from_node else edge.v
-
-            # if there is only one edge for the node, remove the edge
-            if len(self.graph.graph[from_node]) == 1:
-
-                # finger and non-finger circuit
-                if finger:
-                    circuit.extend([*edge.e, to_node])
-                else:
-                    circuit.extend([fr_node, *edge.e, to_node])
+        # walk the CSR arrays of the graph, then map the half-edges back to the edges
+        self.graph.freeze()
+        slots = _hierholzer(self.graph.row_ptr, self.graph.col_idx, self.graph.edge_twin, self.graph.nedges)
 
-                self.graph.remove_edge(from_node, to_node.net, edge.e)
-                self.dfs_order(to_node.net, circuit, finger)
-
-            # if there is multiple edges for the node
+        full_order = []
+        prev = None
+        for slot in slots:
+            edge = self.graph.edge_data[slot]
+
+            # finger and non-finger circuit
+            if finger:
+                # start a new diffusion if the trail is not continuous
+                if prev is None or prev.v_net != edge.u_net:
+                    full_order.append(edge.u)
+                full_order.extend(edge.e_t)
+                full_order.append(edge.v)
             else:
-                # remove the edge if it is not a bridge
-                if not self.is_bridge(edge):
-                    if finger:
-                        circuit.extend([*edge.e, to_node])
-                    else:
-                        circuit.extend([fr_node, *edge.e, to_node])
+                full_order.append(edge.u)
+                full_order.extend(edge.e_t)
+                full_order.append(edge.v)
+
+            prev = edge
 
-                    self.graph.remove_edge(from_node, to_node.net, edge.e)
-                    self.dfs_order(to_node.net, circuit, finger)
+        return full_order
 
-                # if it is a bridge, skip the edge
-                else:
-                    continue
 
     def fleury_algorithm(self, finger: bool=True) -> list:
         """
-        @brief: run Fleury's algorithm to find the circuit order
+        @brief: find the circuit order (Hierholzer's algorithm, linear in the number of edges)
         @param finger: True if the circuit is a finger, False otherwise
         @return: the circuit order
         """
-        full_order = []
-        while True:
-            # choose a starting node
-            start_node = self.initial_node()
-
-            # create a list to store the circuit order
-            order = [start_node] if finger else []
-
-            # run depth first search
-            self.dfs_order(start_node.net, order, finger)
-
-            # extend the circuit order
-            full_order.extend(order)
+        return self.hierholzer(finger)
+
+
+def _hierholzer(row_ptr: list, col_idx: list, edge_twin: list, nedges: int) -> list:
+    """
+    @brief: Hierholzer's algorithm on the CSR arrays of a graph (integers only)
+    @param row_ptr: half-edges of node i are in [row_ptr[i], row_ptr[i+1])
+    @param col_idx: ending node of each half-edge
+    @param edge_twin: twin half-edge of each half-edge
+    @param nedges: number of edges
+    @return: the half-edges in walking order, one trail after the other
+    """
+    num_node  = len(row_ptr) - 1
+    next_slot = row_ptr[:-1]                                            # next unused half-edge of each node
+    degree    = [row_ptr[i+1] - row_ptr[i] for i in range(num_node)]    # remaining degree of each node
+    used      = bytearray(len(col_idx))                                 # consumed half-edges (both directions)
+    remaining = nedges
+
+    # a walk uses up every edge of the component of its starting node, so a degree is either
+    # untouched or zero, and the scans for the starting node never have to go back
+    odd_node = 0            # nodes before it have an even degree
+    live_node = 0           # nodes before it have no edge left
+
+    order = []
+    while remaining:
+        # choose a starting node: odd degree first, otherwise any node with edge left
+        while odd_node < num_node and degree[odd_node] % 2 == 0:
+            odd_node += 1
+        while degree[live_node] == 0:
+            live_node += 1
+        start = odd_node if odd_node < num_node else live_node
+
+        # walk the unused edges, splicing the sub-tours when the walk gets stuck
+        stack = [start]
+        stack_slot = [-1]       # half-edge used to reach each node of the stack
+        trail = []
+        while stack:
+            node = stack[-1]
+
+            slot = next_slot[node]
+            end = row_ptr[node+1]
+            while slot < end and used[slot]:
+                slot += 1
+
+            if slot < end:
+                next_slot[node] = slot + 1
+                used[slot] = used[edge_twin[slot]] = 1
+
+                to_node = col_idx[slot]
+                degree[node] -= 1
+                degree[to_node] -= 1
+                remaining -= 1
+
+                stack.append(to_node)
+                stack_slot.append(slot)
+            else:
+                next_slot[node] = slot
+                stack.pop()
+                slot = stack_slot.pop()
+                if slot != -1:
+                    trail.append(slot)
 
-            # check if there is any edge left
-            unconnected = False
-            for node in self.graph.graph:
-                if len(self.graph.graph[node]) > 0:
-                    unconnected = True
+        trail.reverse()
+        order.extend(trail)
 
-            # if there is no edge left, run the algorithm again
-            if unconnected:
-                continue
-            else:
-                return full_order
\ No newline at end of file
+    return order
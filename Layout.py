@@ -1,11 +1,27 @@
 from Module.DB import *
 from Device_Generator.Topo import MOSFET_Node
-import math
+from math import inf, sqrt
+from types import SimpleNamespace
+from collections import defaultdict
+from functools import lru_cache
+from weakref import WeakKeyDictionary
+
+# technology -> {group type -> design rules}, an entry goes away with its technology
+_RULES_CACHE: WeakKeyDictionary = WeakKeyDictionary()
 
 class MOSFET:
     """
     MOSFET Group Instance: Layout Generation
     """
+    # (current node type, previous node type) -> node layout generator, called with (self, prev_node, curr_node, next_node)
+    NODE_HANDLERS = {
+        ("diff", None):   lambda self, prev_node, curr_node, next_node: self.generate_first_diff_layout(curr_node, next_node),
+        ("gate", "diff"): lambda self, prev_node, curr_node, next_node: self.generate_diff_gate_layout(curr_node),
+        ("diff", "gate"): lambda self, prev_node, curr_node, next_node: self.generate_gate_diff_layout(prev_node, curr_node, next_node),
+        ("diff", "diff"): lambda self, prev_node, curr_node, next_node: self.generate_break_diff_layout(curr_node, next_node),
+        ("gate", "gate"): lambda self, prev_node, curr_node, next_node: self.generate_gate_gate_layout(curr_node),
+    }
+
     def __init__(self, tech: Tech, circuit: Circuit, group: Group):
         self.circuit = circuit
         self.group = group
@@ -17,125 +33,157 @@ class MOSFET:
 
     def get_design_rules(self, tech: Tech) -> None:
         """
-        Get the design rules from the technology
+        Get the design rules from the technology (computed once per technology and group type)
+        """
+        cache = _RULES_CACHE.get(tech)
+        if cache is None:
+            cache = _RULES_CACHE[tech] = {}
+
+        rules = cache.get(self.group.type)
+        if rules is None:
+            rules = cache[self.group.type] = MOSFET.read_design_rules(tech, self.group.type)
+
+        self.__dict__.update(vars(rules))
+
+
+    @staticmethod
+    def read_design_rules(tech: Tech, group_type: str) -> SimpleNamespace:
+        """
+        Read the design rules of the group type from the technology
         """
-        # minimum manufacturing grid
-        self.grid = tech.unit["grid"]
+        rules = SimpleNamespace()
+
+        # minimum manufacturing grid, and the number of grid steps per unit
+        # (None when the grid is not an integer fraction of the unit, e.g. a grid of 2 units)
+        rules.grid = tech.unit["grid"]
+        grid_res = round(1 / rules.grid)
+        rules.grid_res = grid_res if grid_res and abs(grid_res * rules.grid - 1) < 1e-9 else None
 
         # different layers for nmos and pmos
-        if self.group.type == "nmos":
-            self.df = "ndiffusion"
-            self.im = "nimplant"
-            self.ga = "ngate"
-            self.tdf = "pdiffusion"
-            self.tim = "pimplant"
-        elif self.group.type == "pmos":
-            self.df = "pdiffusion"
-            self.im = "pimplant"
-            self.ga = "pgate"
-            self.tdf = "ndiffusion"
-            self.tim = "nimplant"
+        if group_type == "nmos":
+            rules.df = "ndiffusion"
+            rules.im = "nimplant"
+            rules.ga = "ngate"
+            rules.tdf = "pdiffusion"
+            rules.tim = "pimplant"
+        elif group_type == "pmos":
+            rules.df = "pdiffusion"
+            rules.im = "pimplant"
+            rules.ga = "pgate"
+            rules.tdf = "ndiffusion"
+            rules.tim = "nimplant"
 
         # common layers for both nmos and pmos
-        self.po = "poly"
-        self.co = "contact"
-        self.m1 = "metal1"
-        self.nw = "nwell"
-        self.pw = "pwell"
+        rules.po = "poly"
+        rules.co = "contact"
+        rules.m1 = "metal1"
+        rules.nw = "nwell"
+        rules.pw = "pwell"
+
+        # rule tables of the technology
+        msz   = tech.min_size_rule
+        msp   = tech.min_spacing_rule
+        menc  = tech.min_enclosure_rule
+        mext  = tech.min_extension_rule
+        mw    = tech.min_width_rule
+        marea = tech.min_area_rule
+
+        df, im, ga, tdf, tim = rules.df, rules.im, rules.ga, rules.tdf, rules.tim
 
         # design rule alias
-        self.co_sz     = tech.min_size_rule["contact"]
-        self.ga_spc_ga = tech.min_spacing_rule[(self.ga,self.ga)]
-        self.po_spc_co = tech.min_spacing_rule[("poly","contact")]
-        self.co_spc_co = tech.min_spacing_rule[("contact","contact")]
-
-        self.df_enc_co = tech.min_enclosure_rule[(self.df,"contact")]
-        self.df_spc_po = tech.min_spacing_rule[(self.df,"poly")]
-        self.df_spc_df = tech.min_spacing_rule[(self.df,self.df)]
-        self.po_ext_df = tech.min_extension_rule[("poly",self.df)]
-        self.df_ext_po = tech.min_extension_rule[(self.df,"poly")]
-        self.df_wid    = tech.min_width_rule[self.df]
+        rules.co_sz     = msz["contact"]
+        rules.ga_spc_ga = msp[(ga,ga)]
+        rules.po_spc_co = msp[("poly","contact")]
+        rules.co_spc_co = msp[("contact","contact")]
+
+        rules.df_enc_co = menc[(df,"contact")]
+        rules.df_spc_po = msp[(df,"poly")]
+        rules.df_spc_df = msp[(df,df)]
+        rules.po_ext_df = mext[("poly",df)]
+        rules.df_ext_po = mext[(df,"poly")]
+        rules.df_wid    = mw[df]
         
-        self.im_enc_df = tech.min_enclosure_rule[(self.im,self.df)]
-        self.im_enc_ga = tech.min_enclosure_rule[(self.im,self.ga)]
-        self.im_spc_im = tech.min_spacing_rule[(self.im,self.im)]
-        self.im_wid    = tech.min_width_rule[self.im]
-        self.im_area   = tech.min_area_rule[self.im]
-
-        self.nw_enc_pdf = tech.min_enclosure_rule[("nwell","pdiffusion")]
-        self.nw_area    = tech.min_area_rule["nwell"]
-
-        self.m1_wid     = tech.min_width_rule["metal1"]
-        self.m1_spc_m1  = tech.min_spacing_rule[("metal1","metal1")]
-        self.m1_enc_co  = tech.min_enclosure_rule[("metal1","contact")]
-        self.m1_enc_coe = tech.min_enclosure_rule[("metal1","contact","end")]
-
-        # self.tdf_spc_df  = tech.min_spacing_rule[(self.tdf,self.df,"tap")]
-        self.tim_enc_tdf = tech.min_enclosure_rule[(self.tim,self.tdf,"tap")]
-        self.tdf_enc_tco = tech.min_enclosure_rule[(self.tdf,"contact","tap")]
-
-        if (self.tim,self.df,"tap") in tech.min_spacing_rule:
-            self.tim_spc_df  = tech.min_spacing_rule[(self.tim,self.df,"tap")]
-        else:
-            self.tim_spc_df  = 0
+        rules.im_enc_df = menc[(im,df)]
+        rules.im_enc_ga = menc[(im,ga)]
+        rules.im_spc_im = msp[(im,im)]
+        rules.im_wid    = mw[im]
+        rules.im_area   = marea[im]
+
+        rules.nw_enc_pdf = menc[("nwell","pdiffusion")]
+        rules.nw_area    = marea["nwell"]
+
+        rules.m1_wid     = mw["metal1"]
+        rules.m1_spc_m1  = msp[("metal1","metal1")]
+        rules.m1_enc_co  = menc[("metal1","contact")]
+        rules.m1_enc_coe = menc[("metal1","contact","end")]
+
+        # rules.tdf_spc_df  = msp[(tdf,df,"tap")]
+        rules.tim_enc_tdf = menc[(tim,tdf,"tap")]
+        rules.tdf_enc_tco = menc[(tdf,"contact","tap")]
+
+        # optional tap spacing rules
+        rules.tim_spc_df  = msp.get((tim,df,"tap"), 0)
+        rules.im_spc_tdf  = msp.get((im,tdf,"tap"), 0)
+
+        rules.tim_wid     = mw[tim]
+        rules.tdf_wid     = mw[tdf]
+        rules.tim_area    = marea[tim]
+        rules.tdf_area    = marea[tdf]
+
+        # derived rules
+        rules.co_pitch    = rules.co_sz + rules.co_spc_co          # contact to contact pitch
+        rules.df_min_span = rules.df_enc_co*2 + rules.co_sz        # minimum diffusion span around a contact
+        rules.tim_tap_span = rules.tim_enc_tdf*2 + rules.tdf_enc_tco*2 + rules.co_sz   # tap implant span around a contact
 
-        if (self.im,self.tdf,"tap") in tech.min_spacing_rule:
-            self.im_spc_tdf  = tech.min_spacing_rule[(self.im,self.tdf,"tap")]
-        else:
-            self.im_spc_tdf  = 0
+        # user defined (hardcoded) design rules
+        rules.tap_space = 0.2
 
-        self.tim_wid     = tech.min_width_rule[self.tim]
-        self.tdf_wid     = tech.min_width_rule[self.tdf]
-        self.tim_area    = tech.min_area_rule[self.tim]
-        self.tdf_area    = tech.min_area_rule[self.tdf]
+        # distance between the tap implant and the device implant
+        rules.tap_dist = max(rules.tim_spc_df, rules.im_spc_tdf - rules.tim_enc_tdf, rules.tap_space)
 
-        # user defined (hardcoded) design rules
-        self.tap_space = 0.2
+        return rules
 
 
     def initialize_shape(self) -> None:
         """
         Initialize the shape of the group
         """
-        # update the shape of the group
-        if self.group.type == "nmos":
-            self.group.shape = {"ndiffusion": [], "nimplant": [], "poly": [], "contact": [], "metal1": [], "pdiffusion": [], "pimplant": []}
-        elif self.group.type == "pmos":
-            self.group.shape = {"pdiffusion": [], "pimplant": [], "poly": [], "contact": [], "metal1": [], "ndiffusion": [], "nimplant": [], "nwell": []}
+        # update the shape of the group, a layer is added with its first shape
+        self.group.shape = defaultdict(list)
+
+        # right edge of the last diffusion, poly and contact shape placed in the row
+        self._cur = {"df_x1": 0.0, "po_x1": 0.0, "co_x1": 0.0}
 
 
     def generate_layout(self) -> None:
         """
         Layout Generation based on MOSFET topology
         """
+        handlers = MOSFET.NODE_HANDLERS
+
         # get each row topology of the group
         for row in self.group.topology:
+            last = len(row) - 1
+            prev_node, prev_type = None, None
+
             # get each node in the row
-            for i in range(len(row)):
-                # get the current, previous and next node 
-                curr_node = row[i]
-                prev_node = row[i-1] if i > 0 else None
-                next_node = row[i+1] if i < len(row)-1 else None
+            for i, curr_node in enumerate(row):
+                # get the next node (the previous node is carried over from the last iteration)
+                next_node = row[i+1] if i < last else None
+                curr_type = curr_node.type
 
                 # different node condition
-                if curr_node.type == "diff" and prev_node == None:
-                    self.generate_first_diff_layout(curr_node, next_node)
-                    
-                elif curr_node.type == "gate" and prev_node.type == "diff":
-                    self.generate_diff_gate_layout(curr_node)
-
-                elif curr_node.type == "diff" and prev_node.type == "gate":
-                    self.generate_gate_diff_layout(prev_node, curr_node, next_node)
-
-                elif curr_node.type == "diff" and prev_node.type == "diff":
-                    self.generate_break_diff_layout(curr_node, next_node)
-
-                elif curr_node.type == "gate" and prev_node.type == "gate":
-                    self.generate_gate_gate_layout(curr_node)
+                handler = handlers.get((curr_type, prev_type))
+                if handler:
+                    handler(self, prev_node, curr_node, next_node)
 
                 else:
                     print("Error: Invalid Node Type")
 
+                prev_node, prev_type = curr_node, curr_type
+
+        # bounding box of the diffusion shapes, shared by the implant and nwell shapes
+        self._df_bound = self.merge_shape(self.group.shape.get(self.df, []))
 
         # Add Implant and Nwell Shapes
         self.insert_implant_shape()
@@ -154,55 +202,41 @@ class MOSFET:
         """
         @brief: first diffusion node
         """
-        df_shape = []
-        co_shape = []
-        m1_shape = []    
-
         # diffusion shape
         df_x0 = 0
-        df_x1 = self.df_enc_co*2 + self.co_sz
+        df_x1 = self.df_min_span
         df_y0 = 0
-        df_y1 = max(self.df_enc_co*2 + self.co_sz, next_node.width)
-
-        df_shape.append(Box(self.df, [df_x0, df_y0], [df_x1, df_y1]))
+        df_y1 = max(self.df_min_span, next_node.width)
 
         # contact array
-        num_co = int(((df_y1 - df_y0) - self.df_enc_co * 2 - self.co_sz)/(self.co_sz + self.co_spc_co)) + 1     # number of contact
-        df_enc_co = ((df_y1 - df_y0) - (num_co * self.co_sz) - ((num_co-1) * self.co_spc_co)) / 2               # diffusion enclosure contact based on the height
-
         co_x0 = df_x0 + self.df_enc_co
         co_x1 = co_x0 + self.co_sz
 
-        for i in range(num_co):
-            co_y0 = df_y0 + df_enc_co + i*(self.co_sz + self.co_spc_co)
-            co_y1 = co_y0 + self.co_sz
-
-            co_shape.append(Box(self.co, [co_x0, co_y0], [co_x1, co_y1]))
+        co_shape, co_y0, co_y1 = self._contact_column(co_x0, co_x1, df_y0, df_y1, self.df_enc_co)
 
         # metal1 shape
         m1_x0 = co_x0 - self.m1_enc_co
         m1_x1 = co_x1 + self.m1_enc_co
-        m1_y0 = co_shape[0].y[0] - self.m1_enc_coe
-        m1_y1 = co_shape[-1].y[1] + self.m1_enc_coe
-
-        m1_shape.append(Box(self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
+        m1_y0 = co_y0 - self.m1_enc_coe
+        m1_y1 = co_y1 + self.m1_enc_coe
 
         # update the shape of the group
-        self.group.shape[self.df] += df_shape
-        self.group.shape[self.co] += co_shape
-        self.group.shape[self.m1] += m1_shape
+        self.group.shape[self.df].append(Box(self.df, [df_x0, df_y0], [df_x1, df_y1]))
+        self.group.shape[self.co].extend(co_shape)
+        self.group.shape[self.m1].append(Box(self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
         self.group.pin.append(Pin(curr_node.net, self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
 
+        # update the placement cursor of the row
+        self._cur["df_x1"] = df_x1
+        self._cur["co_x1"] = co_x1
+
 
     def generate_diff_gate_layout(self, curr_node: MOSFET_Node) -> None:
         """
         @brief: current gate node and previous diff node
         """
-        df_shape = []
-        po_shape = []
-
         # previous contact shape
-        co_x1 = self.group.shape[self.co][-1].x[1]
+        co_x1 = self._cur["co_x1"]
 
         # diffusion shape
         df_x0 = co_x1 + self.po_spc_co - self.df_ext_po
@@ -210,81 +244,67 @@ class MOSFET:
         df_y0 = 0
         df_y1 = curr_node.width
 
-        df_shape.append(Box(self.df, [df_x0, df_y0], [df_x1, df_y1]))
-
         # poly shape
         po_x0 = df_x0 + self.df_ext_po
         po_x1 = po_x0 + curr_node.length
         po_y0 = df_y0 - self.po_ext_df
         po_y1 = df_y1 + self.po_ext_df
 
-        po_shape.append(Box(self.po, [po_x0, po_y0], [po_x1, po_y1]))
-
         # update the shape of the group
-        self.group.shape[self.df] += df_shape
-        self.group.shape[self.po] += po_shape
+        self.group.shape[self.df].append(Box(self.df, [df_x0, df_y0], [df_x1, df_y1]))
+        self.group.shape[self.po].append(Box(self.po, [po_x0, po_y0], [po_x1, po_y1]))
         self.group.pin.append(Pin(curr_node.net, self.po, [po_x0, po_y0], [po_x1, po_y1]))
 
+        # update the placement cursor of the row
+        self._cur["df_x1"] = df_x1
+        self._cur["po_x1"] = po_x1
+
 
     def generate_gate_diff_layout(self, prev_node: MOSFET_Node, curr_node: MOSFET_Node, next_node: MOSFET_Node) -> None:
         """
         @brief: current diff node and prev gate node
         """
-        df_shape = []
-        co_shape = []
-        m1_shape = []    
-
         # previous poly shape
-        po_x1 = self.group.shape[self.po][-1].x[1]
+        po_x1 = self._cur["po_x1"]
 
         # diffusion shape
         df_x0 = po_x1 + self.po_spc_co - self.df_enc_co
         df_x1 = df_x0 + self.df_enc_co*2 + self.co_sz
         df_y0 = 0
         if next_node and next_node.type == "gate":
-            df_y1 = max(self.df_enc_co*2 + self.co_sz, prev_node.width, next_node.width)
+            df_y1 = max(self.df_min_span, prev_node.width, next_node.width)
         else:
-            df_y1 = max(self.df_enc_co*2 + self.co_sz, prev_node.width)
-
-        df_shape.append(Box(self.df, [df_x0, df_y0], [df_x1, df_y1]))
+            df_y1 = max(self.df_min_span, prev_node.width)
 
         # contact array
-        num_co = int(((df_y1 - df_y0) - self.df_enc_co * 2 - self.co_sz)/(self.co_sz + self.co_spc_co)) + 1     # number of contact
-        df_enc_co = ((df_y1 - df_y0) - (num_co * self.co_sz) - ((num_co-1) * self.co_spc_co)) / 2               # diffusion enclosure contact based on the height
-
         co_x0 = df_x0 + self.df_enc_co
         co_x1 = co_x0 + self.co_sz
 
-        for i in range(num_co):
-            co_y0 = df_y0 + df_enc_co + i*(self.co_sz + self.co_spc_co)
-            co_y1 = co_y0 + self.co_sz
-
-            co_shape.append(Box(self.co, [co_x0, co_y0], [co_x1, co_y1]))
+        co_shape, co_y0, co_y1 = self._contact_column(co_x0, co_x1, df_y0, df_y1, self.df_enc_co)
 
         # metal1 shape
         m1_x0 = co_x0 - self.m1_enc_co
         m1_x1 = co_x1 + self.m1_enc_co
-        m1_y0 = co_shape[0].y[0] - self.m1_enc_coe
-        m1_y1 = co_shape[-1].y[1] + self.m1_enc_coe
-
-        m1_shape.append(Box(self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
+        m1_y0 = co_y0 - self.m1_enc_coe
+        m1_y1 = co_y1 + self.m1_enc_coe
 
         # update the shape of the group
-        self.group.shape[self.df] += df_shape
-        self.group.shape[self.co] += co_shape
-        self.group.shape[self.m1] += m1_shape
+        self.group.shape[self.df].append(Box(self.df, [df_x0, df_y0], [df_x1, df_y1]))
+        self.group.shape[self.co].extend(co_shape)
+        self.group.shape[self.m1].append(Box(self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
         self.group.pin.append(Pin(curr_node.net, self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
 
+        # update the placement cursor of the row
+        self._cur["df_x1"] = df_x1
+        self._cur["co_x1"] = co_x1
+
 
     def generate_gate_gate_layout(self, curr_node: MOSFET_Node) -> None:
         """
         @brief: continuous gate node
         """
-        df_shape = []
-        po_shape = []
-
         # previous poly shape
-        po_x1 = self.group.shape[self.po][-1].x[1]
+        po_x1 = self._cur["po_x1"]
 
         # diffusion shape
         df_x0 = po_x1 + self.ga_spc_ga - self.df_ext_po
@@ -292,481 +312,388 @@ class MOSFET:
         df_y0 = 0
         df_y1 = curr_node.width
 
-        df_shape.append(Box(self.df, [df_x0, df_y0], [df_x1, df_y1]))
-
         # poly shape
         po_x0 = df_x0 + self.df_ext_po
         po_x1 = po_x0 + curr_node.length
         po_y0 = df_y0 - self.po_ext_df
         po_y1 = df_y1 + self.po_ext_df
 
-        po_shape.append(Box(self.po, [po_x0, po_y0], [po_x1, po_y1]))
-
         # update the shape of the group
-        self.group.shape[self.df] += df_shape
-        self.group.shape[self.po] += po_shape
+        self.group.shape[self.df].append(Box(self.df, [df_x0, df_y0], [df_x1, df_y1]))
+        self.group.shape[self.po].append(Box(self.po, [po_x0, po_y0], [po_x1, po_y1]))
         self.group.pin.append(Pin(curr_node.net, self.po, [po_x0, po_y0], [po_x1, po_y1]))
 
+        # update the placement cursor of the row
+        self._cur["df_x1"] = df_x1
+        self._cur["po_x1"] = po_x1
+
 
     def generate_break_diff_layout(self, curr_node: MOSFET_Node, next_node: MOSFET_Node) -> None:
         """
         @brief: break diffusion node
         """
-        df_shape = []
-        co_shape = []
-        m1_shape = []
-        
         # previous diffusion shape
-        df_x1 = self.group.shape[self.df][-1].x[1]
+        df_x1 = self._cur["df_x1"]
 
         # diffusion shape
         df_x0 = df_x1 + self.df_spc_df
         df_x1 = df_x0 + self.df_enc_co*2 + self.co_sz
         df_y0 = 0
-        df_y1 = max(self.df_enc_co*2 + self.co_sz, next_node.width)
-
-        df_shape.append(Box(self.df, [df_x0, df_y0], [df_x1, df_y1]))
+        df_y1 = max(self.df_min_span, next_node.width)
 
         # contact array
-        num_co = int(((df_y1 - df_y0) - self.df_enc_co * 2 - self.co_sz)/(self.co_sz + self.co_spc_co)) + 1     # number of contact
-        df_enc_co = ((df_y1 - df_y0) - (num_co * self.co_sz) - ((num_co-1) * self.co_spc_co)) / 2               # diffusion enclosure contact based on the height
-
         co_x0 = df_x0 + self.df_enc_co
         co_x1 = co_x0 + self.co_sz
 
-        for i in range(num_co):
-            co_y0 = df_y0 + df_enc_co + i*(self.co_sz + self.co_spc_co)
-            co_y1 = co_y0 + self.co_sz
-
-            co_shape.append(Box(self.co, [co_x0, co_y0], [co_x1, co_y1]))
+        co_shape, co_y0, co_y1 = self._contact_column(co_x0, co_x1, df_y0, df_y1, self.df_enc_co)
 
         # metal1 shape
         m1_x0 = co_x0 - self.m1_enc_co
         m1_x1 = co_x1 + self.m1_enc_co
-        m1_y0 = co_shape[0].y[0] - self.m1_enc_coe
-        m1_y1 = co_shape[-1].y[1] + self.m1_enc_coe
-
-        m1_shape.append(Box(self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
+        m1_y0 = co_y0 - self.m1_enc_coe
+        m1_y1 = co_y1 + self.m1_enc_coe
 
         # update the shape of the group
-        self.group.shape[self.df] += df_shape
-        self.group.shape[self.co] += co_shape
-        self.group.shape[self.m1] += m1_shape
+        self.group.shape[self.df].append(Box(self.df, [df_x0, df_y0], [df_x1, df_y1]))
+        self.group.shape[self.co].extend(co_shape)
+        self.group.shape[self.m1].append(Box(self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
         self.group.pin.append(Pin(curr_node.net, self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
 
+        # update the placement cursor of the row
+        self._cur["df_x1"] = df_x1
+        self._cur["co_x1"] = co_x1
+
+
+    def _contact_column(self, x0: float, x1: float, y0: float, y1: float, enc: float) -> tuple:
+        """
+        @brief: vertical contact array between x0 and x1, centered between y0 and y1
+        @param: enc -> minimum enclosure of the contact
+        @return: the contacts, and the bottom and top edge of the array
+        """
+        co, co_sz = self.co, self.co_sz
+        coords = _contact_coords(y0, y1, enc, co_sz, self.co_spc_co)
+        return [Box(co, [x0, co_y0], [x1, co_y0 + co_sz]) for co_y0 in coords], coords[0], coords[-1] + co_sz
+
+
+    def _contact_row(self, x0: float, x1: float, y0: float, y1: float, enc: float) -> tuple:
+        """
+        @brief: horizontal contact array between y0 and y1, centered between x0 and x1
+        @param: enc -> minimum enclosure of the contact
+        @return: the contacts, and the left and right edge of the array
+        """
+        co, co_sz = self.co, self.co_sz
+        coords = _contact_coords(x0, x1, enc, co_sz, self.co_spc_co)
+        return [Box(co, [co_x0, y0], [co_x0 + co_sz, y1]) for co_x0 in coords], coords[0], coords[-1] + co_sz
+
+
+    def _snap(self, v: float) -> float:
+        """
+        @brief: snap the coordinate to the manufacturing grid
+        @param: v -> coordinate
+        """
+        # count the grid steps as an integer, the division gives the nearest float of the snapped coordinate
+        res = self.grid_res
+        if res:
+            return round(v * res) / res
+
+        # any other grid is snapped through the grid size
+        return round(v / self.grid) * self.grid
+
+
+    def _snap_bound(self, x0: float, x1: float, y0: float, y1: float) -> tuple:
+        """
+        @brief: snap the bounds of a shape to the manufacturing grid in one pass
+        @param: x0, x1, y0, y1 -> bounds of the shape
+        """
+        snap = self._snap
+        return snap(x0), snap(x1), snap(y0), snap(y1)
 
-    def merge_shape(self, shape: list) -> list:
+
+    def merge_shape(self, *shapes: list) -> tuple:
         """
         @brief: merge the shape based on the layer
-        @param: shape -> list of shape
-        """
-        x = []
-        y = []
-        for shp in shape:
-            x.append(shp.x[0])
-            x.append(shp.x[1])
-            y.append(shp.y[0])
-            y.append(shp.y[1])
-        
-        if x and y:
-            return min(x), max(x), min(y), max(y)
+        @param: shapes -> list of shape of each layer to merge
+        @return: x0, x1, y0, y1 of the bounding box of all the layers (None when there is no shape)
+        """
+        # single pass over the boxes of all the layers, the layers are not concatenated
+        # (boxes are stored as lower left and upper right corner)
+        x0 = y0 = inf
+        x1 = y1 = -inf
+        for shape in shapes:
+            for shp in shape:
+                shp_x, shp_y = shp.x, shp.y
+                if shp_x[0] < x0:
+                    x0 = shp_x[0]
+                if shp_x[1] > x1:
+                    x1 = shp_x[1]
+                if shp_y[0] < y0:
+                    y0 = shp_y[0]
+                if shp_y[1] > y1:
+                    y1 = shp_y[1]
+
+        if x0 != inf:
+            return x0, x1, y0, y1
         
         else:
             return None, None, None, None
 
 
     def insert_implant_shape(self) -> None:
-        # Get each diffusion shape
-        for shape in self.group.shape[self.df]:
-            # Add Implant Layer
-            im_x0 = shape.x[0] - self.im_enc_df
-            im_x1 = shape.x[1] + self.im_enc_df
-            im_y0 = shape.y[0] - max(self.im_enc_df, self.im_enc_ga)
-            im_y1 = shape.y[1] + max(self.im_enc_df, self.im_enc_ga)
-
-            self.group.shape[self.im].append(Box(self.im, [im_x0, im_y0], [im_x1, im_y1]))
-
-        # Merge Implant layer
-        im_x0, im_x1, im_y0, im_y1 = self.merge_shape(self.group.shape[self.im])
-
-        if im_x0 and im_x1 and im_y0 and im_y1:
-            # Minimum Implant Area Rule
-            if (im_x1 - im_x0) * (im_y1 - im_y0) < self.im_area:
-                scale = math.sqrt(self.im_area / ((im_x1 - im_x0) * (im_y1 - im_y0)))
-                im_x0 = im_x0 - (im_x1 - im_x0) * scale / 2
-                im_x1 = im_x1 + (im_x1 - im_x0) * scale / 2
-                im_y0 = im_y0 - (im_y1 - im_y0) * scale / 2
-                im_y1 = im_y1 + (im_y1 - im_y0) * scale / 2
-
-                # round the shape of the group
-                im_x0 = round(im_x0/self.grid) * self.grid
-                im_x1 = round(im_x1/self.grid) * self.grid
-                im_y0 = round(im_y0/self.grid) * self.grid
-                im_y1 = round(im_y1/self.grid) * self.grid
-
-            # Update Implant Layer
-            self.group.shape[self.im] = [Box(self.im, [im_x0, im_y0], [im_x1, im_y1])]
+        # no diffusion to enclose
+        df_x0, df_x1, df_y0, df_y1 = self._df_bound
+        if df_x0 is None:
+            return
+
+        # the merged implant encloses the bounding box of the diffusion shapes
+
+        # Add Implant Layer
+        im_enc_y = max(self.im_enc_df, self.im_enc_ga)
+        im_x0 = df_x0 - self.im_enc_df
+        im_x1 = df_x1 + self.im_enc_df
+        im_y0 = df_y0 - im_enc_y
+        im_y1 = df_y1 + im_enc_y
+
+        curr_area = (im_x1 - im_x0) * (im_y1 - im_y0)
+        # Minimum Implant Area Rule
+        if curr_area < self.im_area:
+
+            scale = sqrt(self.im_area / curr_area)
+            width = (im_x1 - im_x0) * scale
+            height = (im_y1 - im_y0) * scale
+
+            center_x = (im_x0 + im_x1) / 2
+            center_y = (im_y0 + im_y1) / 2
+
+            im_x0 = center_x - width / 2
+            im_x1 = center_x + width / 2
+            im_y0 = center_y - height / 2
+            im_y1 = center_y + height / 2
+
+            # round the shape of the group
+            im_x0, im_x1, im_y0, im_y1 = self._snap_bound(im_x0, im_x1, im_y0, im_y1)
+
+        # Update Implant Layer
+        self.group.shape[self.im] = [Box(self.im, [im_x0, im_y0], [im_x1, im_y1])]
 
 
     def insert_nwell_shape(self) -> None:
-        if self.group.type == "pmos":
-            # Get each diffusion shape
-            for shape in self.group.shape[self.df] + self.group.shape[self.tdf]:
-                # Add Nwell Layer
-                nw_x0 = shape.x[0] - self.nw_enc_pdf
-                nw_x1 = shape.x[1] + self.nw_enc_pdf
-                nw_y0 = shape.y[0] - self.nw_enc_pdf
-                nw_y1 = shape.y[1] + self.nw_enc_pdf
+        # nwell only for pmos, and only around diffusion shapes (the taps are placed around the diffusion)
+        df_x0, df_x1, df_y0, df_y1 = self._df_bound
+        if self.group.type != "pmos" or df_x0 is None:
+            return
 
-                self.group.shape[self.nw].append(Box(self.nw, [nw_x0, nw_y0], [nw_x1, nw_y1]))
+        # Merge the tap diffusion shapes into the diffusion bounds, the merged nwell encloses their bounding box
+        tdf_shape = self.group.shape.get(self.tdf)
+        if tdf_shape:
+            tdf_x0, tdf_x1, tdf_y0, tdf_y1 = self.merge_shape(tdf_shape)
+            df_x0, df_x1 = min(df_x0, tdf_x0), max(df_x1, tdf_x1)
+            df_y0, df_y1 = min(df_y0, tdf_y0), max(df_y1, tdf_y1)
 
-            # Merge Nwell layer
-            nw_x0, nw_x1, nw_y0, nw_y1 = self.merge_shape(self.group.shape[self.nw])
+        # Add Nwell Layer
+        nw_x0 = df_x0 - self.nw_enc_pdf
+        nw_x1 = df_x1 + self.nw_enc_pdf
+        nw_y0 = df_y0 - self.nw_enc_pdf
+        nw_y1 = df_y1 + self.nw_enc_pdf
 
-            if nw_x0 and nw_x1 and nw_y0 and nw_y1:
-                curr_area = (nw_x1 - nw_x0) * (nw_y1 - nw_y0)
-                # Minimum Nwell Area Rule
-                if curr_area < self.nw_area:
+        curr_area = (nw_x1 - nw_x0) * (nw_y1 - nw_y0)
+        # Minimum Nwell Area Rule
+        if curr_area < self.nw_area:
 
-                    scale = math.sqrt(self.nw_area / curr_area)
-                    width = (nw_x1 - nw_x0) * scale
-                    height = (nw_y1 - nw_y0) * scale
+            scale = sqrt(self.nw_area / curr_area)
+            width = (nw_x1 - nw_x0) * scale
+            height = (nw_y1 - nw_y0) * scale
 
-                    center_x = (nw_x0 + nw_x1) / 2
-                    center_y = (nw_y0 + nw_y1) / 2
+            center_x = (nw_x0 + nw_x1) / 2
+            center_y = (nw_y0 + nw_y1) / 2
 
-                    nw_x0 = center_x - width / 2
-                    nw_x1 = center_x + width / 2
-                    nw_y0 = center_y - height / 2
-                    nw_y1 = center_y + height / 2
+            nw_x0 = center_x - width / 2
+            nw_x1 = center_x + width / 2
+            nw_y0 = center_y - height / 2
+            nw_y1 = center_y + height / 2
 
-                    # round the shape of the group
-                    nw_x0 = round(nw_x0/self.grid) * self.grid
-                    nw_x1 = round(nw_x1/self.grid) * self.grid
-                    nw_y0 = round(nw_y0/self.grid) * self.grid
-                    nw_y1 = round(nw_y1/self.grid) * self.grid
+            # round the shape of the group
+            nw_x0, nw_x1, nw_y0, nw_y1 = self._snap_bound(nw_x0, nw_x1, nw_y0, nw_y1)
 
-                # Update Nwell Layer
-                self.group.shape[self.nw] = [Box(self.nw, [nw_x0, nw_y0], [nw_x1, nw_y1])]
+        # Update Nwell Layer
+        self.group.shape[self.nw] = [Box(self.nw, [nw_x0, nw_y0], [nw_x1, nw_y1])]
 
 
     def create_body(self, body_net: str) -> None:
-        if self.group.constraint["tap"]:
-            tap_position = self.group.constraint["tap"].split(",")
-
-            top_tim_shape, btm_tim_shape, rgt_tim_shape, lft_tim_shape = [], [], [], []
-            top_tco_shape, btm_tco_shape, rgt_tco_shape, lft_tco_shape = [], [], [], []
-            top_tdf_shape, btm_tdf_shape, rgt_tdf_shape, lft_tdf_shape = [], [], [], []
-            top_m1_shape, btm_m1_shape, rgt_m1_shape, lft_m1_shape = [], [], [], []
-            top_pin, btm_pin, rgt_pin, lft_pin = [], [], [], []
-            
-            if "t" in tap_position:
-                dist = max(self.tim_spc_df, self.im_spc_tdf - self.tim_enc_tdf, self.tap_space)
-
-                # implant shape
-                tim_x0 = self.group.shape[self.df][0].x[0]  - self.tim_enc_tdf
-                tim_x1 = self.group.shape[self.df][-1].x[1] + self.tim_enc_tdf
-                tim_y0 = self.group.shape[self.im][0].y[1] + dist
-                tim_y1 = tim_y0 + self.tim_enc_tdf*2 + self.tdf_enc_tco*2 + self.co_sz
-
-                # minimum implant width rule
-                if tim_y1 - tim_y0 < self.im_wid:
-                    # scale tim_y1
-                    tim_y1 = tim_y0 + self.im_wid
-                    tim_y1 = round(tim_y1/self.grid) * self.grid
-
-                # minimum implant area rule
-                if not "r" in tap_position and not "l" in tap_position:
-                    if (tim_y1 - tim_y0) * (tim_x1 - tim_x0) < self.tim_area:
-                        # scale tim_y1 only
-                        tim_y1 = tim_y0 + (self.tim_area / (tim_x1 - tim_x0))
-                        tim_y1 = round(tim_y1/self.grid) * self.grid
-
-                top_tim_shape.append(Box(self.tim, [tim_x0, tim_y0], [tim_x1, tim_y1]))
-
-                # diffusion shape
-                tdf_x0 = self.group.shape[self.df][0].x[0]
-                tdf_x1 = self.group.shape[self.df][-1].x[1]
-                tdf_y0 = tim_y0 + self.tim_enc_tdf
-                tdf_y1 = tim_y1 - self.tim_enc_tdf
-
-                top_tdf_shape.append(Box(self.tdf, [tdf_x0, tdf_y0], [tdf_x1, tdf_y1]))
-
-                # contact array
-                num_co = int(((tdf_x1 - tdf_x0) - self.tdf_enc_tco * 2 - self.co_sz)/(self.co_sz + self.co_spc_co)) + 1
-                tdf_enc_tco_x = ((tdf_x1 - tdf_x0) - (num_co * self.co_sz) - ((num_co-1) * self.co_spc_co)) / 2
-                tdf_enc_tco_y = ((tdf_y1 - tdf_y0) - self.co_sz) / 2
-
-                tco_y0 = tdf_y0 + tdf_enc_tco_y
-                tco_y1 = tdf_y1 - tdf_enc_tco_y
-                for i in range(num_co):
-                    tco_x0 = tdf_x0 + tdf_enc_tco_x + i*(self.co_sz + self.co_spc_co)
-                    tco_x1 = tco_x0 + self.co_sz
-
-                    top_tco_shape.append(Box(self.co, [tco_x0, tco_y0], [tco_x1, tco_y1]))
-                
-                # metal1 shape
-                m1_x0 = top_tco_shape[0].x[0] - self.m1_enc_coe
-                m1_x1 = top_tco_shape[-1].x[1] + self.m1_enc_coe
-                m1_y0 = tco_y0 - self.m1_enc_co
-                m1_y1 = tco_y1 + self.m1_enc_co
-
-                top_m1_shape.append(Box(self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
-                top_pin.append(Pin(body_net, self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
-                
-            if "b" in tap_position:
-                dist = max(self.tim_spc_df, self.im_spc_tdf - self.tim_enc_tdf, self.tap_space)
-
-                # implant shape
-                tim_x0 = self.group.shape[self.df][0].x[0]  - self.tim_enc_tdf
-                tim_x1 = self.group.shape[self.df][-1].x[1] + self.tim_enc_tdf
-                tim_y1 = self.group.shape[self.im][0].y[0] - dist
-                tim_y0 = tim_y1 - self.tim_enc_tdf*2 - self.tdf_enc_tco*2 - self.co_sz
-
-                # minimum implant width rule
-                if tim_y1 - tim_y0 < self.im_wid:
-                    # scale tim_y0
-                    tim_y0 = tim_y1 - self.im_wid
-                    tim_y0 = round(tim_y0/self.grid) * self.grid
-
-                # minimum implant area rule
-                if not "r" in tap_position and not "l" in tap_position:
-                    if (tim_y1 - tim_y0) * (tim_x1 - tim_x0) < self.tim_area:
-                        # scale tim_y0 only
-                        tim_y0 = tim_y1 - (self.tim_area / (tim_x1 - tim_x0))
-                        tim_y0 = round(tim_y0/self.grid) * self.grid
-                
-                btm_tim_shape.append(Box(self.tim, [tim_x0, tim_y0], [tim_x1, tim_y1]))
-
-                # diffusion shape
-                tdf_x0 = self.group.shape[self.df][0].x[0]
-                tdf_x1 = self.group.shape[self.df][-1].x[1]
-                tdf_y0 = tim_y0 + self.tim_enc_tdf
-                tdf_y1 = tim_y1 - self.tim_enc_tdf
-
-                btm_tdf_shape.append(Box(self.tdf, [tdf_x0, tdf_y0], [tdf_x1, tdf_y1]))
-
-                # contact array
-                num_co = int(((tdf_x1 - tdf_x0) - self.tdf_enc_tco * 2 - self.co_sz)/(self.co_sz + self.co_spc_co)) + 1
-                tdf_enc_tco_x = ((tdf_x1 - tdf_x0) - (num_co * self.co_sz) - ((num_co-1) * self.co_spc_co)) / 2
-                tdf_enc_tco_y = ((tdf_y1 - tdf_y0) - self.co_sz) / 2
-
-                tco_y0 = tdf_y0 + tdf_enc_tco_y
-                tco_y1 = tdf_y1 - tdf_enc_tco_y
-                for i in range(num_co):
-                    tco_x0 = tdf_x0 + tdf_enc_tco_x + i*(self.co_sz + self.co_spc_co)
-                    tco_x1 = tco_x0 + self.co_sz
-
-                    btm_tco_shape.append(Box(self.co, [tco_x0, tco_y0], [tco_x1, tco_y1]))
-                
-                # metal1 shape
-                m1_x0 = btm_tco_shape[0].x[0] - self.m1_enc_coe
-                m1_x1 = btm_tco_shape[-1].x[1] + self.m1_enc_coe
-                m1_y0 = tco_y0 - self.m1_enc_co
-                m1_y1 = tco_y1 + self.m1_enc_co
-
-                btm_m1_shape.append(Box(self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
-                btm_pin.append(Pin(body_net, self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
-
-            if "r" in tap_position:
-                dist = max(self.tim_spc_df, self.im_spc_tdf - self.tim_enc_tdf, self.tap_space)
-
-                # implant shape
-                tim_y0 = self.group.shape[self.df][0].y[0] - self.tim_enc_tdf
-                tim_y1 = self.group.shape[self.df][-1].y[1] + self.tim_enc_tdf
-                tim_x0 = self.group.shape[self.im][0].x[1] + dist
-                tim_x1 = tim_x0 + self.tim_enc_tdf*2 + self.tdf_enc_tco*2 + self.co_sz
-
-                # minimum implant width rule
-                if tim_x1 - tim_x0 < self.im_wid:
-                    # scale tim_x1
-                    tim_x1 = tim_x0 + self.im_wid
-                    tim_x1 = round(tim_x1/self.grid) * self.grid
-                
-                if "t" in tap_position or "b" in tap_position:
-                    for shp in top_tim_shape + btm_tim_shape:
-                        # update previous implant shape
-                        shp.x[1] = tim_x1           # follow right tap
-
-                        # update current implant shape
-                        if shp.y[1] < tim_y0:       # follow bottom tap
-                            tim_y0 = shp.y[1]
-
-                        if shp.y[0] > tim_y1:       # follow top tap
-                            tim_y1 = shp.y[0]
-                else:
-                    # minimum implant area rule
-                    if (tim_y1 - tim_y0) * (tim_x1 - tim_x0) < self.tim_area:
-                        # scale tim_x1 only
-                        tim_x1 = tim_x0 + (self.tim_area / (tim_y1 - tim_y0))
-                        tim_x1 = round(tim_x1/self.grid) * self.grid
-
-
-
-                rgt_tim_shape.append(Box(self.tim, [tim_x0, tim_y0], [tim_x1, tim_y1]))
-
-                # diffusion shape
-                tdf_x0 = tim_x0 + self.tim_enc_tdf
-                tdf_x1 = tim_x1 - self.tim_enc_tdf
-                tdf_y0 = self.group.shape[self.df][0].y[0]
-                tdf_y1 = self.group.shape[self.df][-1].y[1]
-
-                if "t" in tap_position or "b" in tap_position:
-                    for shp in top_tdf_shape + btm_tdf_shape:
-                        # update previous diffusion shape
-                        shp.x[1] = tdf_x1
-            
-                        # update current diffusion shape
-                        if shp.y[1] < tdf_y0:
-                            tdf_y0 = shp.y[1]
-                        
-                        if shp.y[0] > tdf_y1:
-                            tdf_y1 = shp.y[0]
-
-                rgt_tdf_shape.append(Box(self.tdf, [tdf_x0, tdf_y0], [tdf_x1, tdf_y1]))
-
-                # contact array
-                num_co = int(((tdf_y1 - tdf_y0) - self.tdf_enc_tco * 2 - self.co_sz)/(self.co_sz + self.co_spc_co)) + 1
-                tdf_enc_tco_x = ((tdf_x1 - tdf_x0) - self.co_sz) / 2
-                tdf_enc_tco_y = ((tdf_y1 - tdf_y0) - (num_co * self.co_sz) - ((num_co-1) * self.co_spc_co)) / 2
-
-                tco_x0 = tdf_x0 + tdf_enc_tco_x
-                tco_x1 = tdf_x1 - tdf_enc_tco_x
-                for i in range(num_co):
-                    tco_y0 = tdf_y0 + tdf_enc_tco_y + i*(self.co_sz + self.co_spc_co)
-                    tco_y1 = tco_y0 + self.co_sz
-
-                    rgt_tco_shape.append(Box(self.co, [tco_x0, tco_y0], [tco_x1, tco_y1]))
-
-                # metal1 shape
-                m1_x0 = tco_x0 - self.m1_enc_co
-                m1_x1 = tco_x1 + self.m1_enc_co
-                m1_y0 = rgt_tco_shape[0].y[0] - self.m1_enc_coe
-                m1_y1 = rgt_tco_shape[-1].y[1] + self.m1_enc_coe
-
-                if "t" in tap_position or "b" in tap_position:
-                    for shp in top_m1_shape + btm_m1_shape:
-                        # update previous metal1 shape
-                        shp.x[1] = m1_x1
-
-                        # update current metal1 shape
-                        if shp.y[1] < m1_y0:
-                            m1_y0 = shp.y[1]
-
-                        if shp.y[0] > m1_y1:
-                            m1_y1 = shp.y[0]
-
-                    for pin in top_pin + btm_pin:
-                        pin.pt2[0] = m1_x1
-
-                rgt_m1_shape.append(Box(self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
-                rgt_pin.append(Pin(body_net, self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
-
-            if "l" in tap_position:
-                dist = max(self.tim_spc_df, self.im_spc_tdf - self.tim_enc_tdf, self.tap_space)
-
-                # implant shape
-                tim_y0 = self.group.shape[self.df][0].y[0] - self.tim_enc_tdf
-                tim_y1 = self.group.shape[self.df][-1].y[1] + self.tim_enc_tdf
-                tim_x1 = self.group.shape[self.im][0].x[0] - dist
-                tim_x0 = tim_x1 - self.tim_enc_tdf*2 - self.tdf_enc_tco*2 - self.co_sz
-
-                # minimum implant width rule
-                if tim_x1 - tim_x0 < self.im_wid:
-                    # scale tim_x0
-                    tim_x0 = tim_x1 - self.im_wid
-                    tim_x0 = round(tim_x0/self.grid) * self.grid
-
-                if "t" in tap_position or "b" in tap_position:
-                    for shp in top_tim_shape + btm_tim_shape:
-                        # update previous implant shape
-                        shp.x[0] = tim_x0           # follow left tap
-                    
-                        # update current implant shape
-                        if shp.y[1] < tim_y0:
-                            tim_y0 = shp.y[1]
-                        
-                        if shp.y[0] > tim_y1:
-                            tim_y1 = shp.y[0]
-                else:
-                    # minimum implant area rule
-                    if (tim_y1 - tim_y0) * (tim_x1 - tim_x0) < self.tim_area:
-                        # scale tim_x0 only
-                        tim_x0 = tim_x1 - (self.tim_area / (tim_y1 - tim_y0))
-                        tim_x0 = round(tim_x0/self.grid) * self.grid
-
-                lft_tim_shape.append(Box(self.tim, [tim_x0, tim_y0], [tim_x1, tim_y1]))
-
-                # diffusion shape
-                tdf_x0 = tim_x0 + self.tim_enc_tdf
-                tdf_x1 = tim_x1 - self.tim_enc_tdf
-                tdf_y0 = self.group.shape[self.df][0].y[0]
-                tdf_y1 = self.group.shape[self.df][-1].y[1]
-
-                if "t" in tap_position or "b" in tap_position:
-                    for shp in top_tdf_shape + btm_tdf_shape:
-                        # update previous diffusion shape
-                        shp.x[0] = tdf_x0
-            
-                        # update current diffusion shape
-                        if shp.y[1] < tdf_y0:
-                            tdf_y0 = shp.y[1]
-                        
-                        if shp.y[0] > tdf_y1:
-                            tdf_y1 = shp.y[0]
-
-                lft_tdf_shape.append(Box(self.tdf, [tdf_x0, tdf_y0], [tdf_x1, tdf_y1]))
-
-                # contact array
-                num_co = int(((tdf_y1 - tdf_y0) - self.tdf_enc_tco * 2 - self.co_sz)/(self.co_sz + self.co_spc_co)) + 1
-                tdf_enc_tco_x = ((tdf_x1 - tdf_x0) - self.co_sz) / 2
-                tdf_enc_tco_y = ((tdf_y1 - tdf_y0) - (num_co * self.co_sz) - ((num_co-1) * self.co_spc_co)) / 2
-
-                tco_x0 = tdf_x0 + tdf_enc_tco_x
-                tco_x1 = tdf_x1 - tdf_enc_tco_x
-
-                for i in range(num_co):
-                    tco_y0 = tdf_y0 + tdf_enc_tco_y + i*(self.co_sz + self.co_spc_co)
-                    tco_y1 = tco_y0 + self.co_sz
-
-                    lft_tco_shape.append(Box(self.co, [tco_x0, tco_y0], [tco_x1, tco_y1]))
-
-                # metal1 shape
-                m1_x0 = tco_x0 - self.m1_enc_co
-                m1_x1 = tco_x1 + self.m1_enc_co
-                m1_y0 = lft_tco_shape[0].y[0] - self.m1_enc_coe
-                m1_y1 = lft_tco_shape[-1].y[1] + self.m1_enc_coe
-
-                if "t" in tap_position or "b" in tap_position:
-                    for shp in top_m1_shape + btm_m1_shape:
-                        # update previous metal1 shape
-                        shp.x[0] = m1_x0
-
-                        # update current metal1 shape
-                        if shp.y[1] < m1_y0:
-                            m1_y0 = shp.y[1]
-
-                        if shp.y[0] > m1_y1:
-                            m1_y1 = shp.y[0]
-
-                    for pin in top_pin + btm_pin:
-                        # update previous pin
-                        pin.pt1[0] = m1_x0
-
-                lft_m1_shape.append(Box(self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
-                lft_pin.append(Pin(body_net, self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
-
-            # update the shape of the group
-            self.group.shape[self.tim] += top_tim_shape + btm_tim_shape + rgt_tim_shape + lft_tim_shape
-            self.group.shape[self.tdf] += top_tdf_shape + btm_tdf_shape + rgt_tdf_shape + lft_tdf_shape
-            self.group.shape[self.co] += top_tco_shape + btm_tco_shape + rgt_tco_shape + lft_tco_shape
-            self.group.shape[self.m1] += top_m1_shape + btm_m1_shape + rgt_m1_shape + lft_m1_shape
-            self.group.pin += top_pin + btm_pin + rgt_pin + lft_pin
+        # no tap to create
+        if not self.group.constraint["tap"]:
+            return
+
+        tap_position = self.group.constraint["tap"].split(",")
+        vertical = "r" in tap_position or "l" in tap_position
+
+        # diffusion bounds of the device, shared by all the taps
+        df_shape = self.group.shape[self.df]
+        df_bound = (df_shape[0].x[0], df_shape[-1].x[1], df_shape[0].y[0], df_shape[-1].y[1])
+
+        # top and bottom taps
+        taps = []
+        for side, sign in (("t", 1), ("b", -1)):
+            if side in tap_position:
+                taps.append(self._create_horizontal_tap(sign, df_bound, not vertical))
+
+        # right and left taps, joined with the top and bottom taps
+        horizontal_taps = list(taps)
+        for side, sign in (("r", 1), ("l", -1)):
+            if side in tap_position:
+                taps.append(self._create_vertical_tap(sign, df_bound, horizontal_taps))
+
+        # update the shape of the group, the tap bounds are final once all the taps are joined
+        for tap in taps:
+            tim_x0, tim_x1, tim_y0, tim_y1 = tap.tim
+            tdf_x0, tdf_x1, tdf_y0, tdf_y1 = tap.tdf
+            m1_x0, m1_x1, m1_y0, m1_y1 = tap.m1
+
+            self.group.shape[self.tim].append(Box(self.tim, [tim_x0, tim_y0], [tim_x1, tim_y1]))
+            self.group.shape[self.tdf].append(Box(self.tdf, [tdf_x0, tdf_y0], [tdf_x1, tdf_y1]))
+            self.group.shape[self.co].extend(tap.tco)
+            self.group.shape[self.m1].append(Box(self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
+            self.group.pin.append(Pin(body_net, self.m1, [m1_x0, m1_y0], [m1_x1, m1_y1]))
+
+
+    def _create_horizontal_tap(self, sign: int, df_bound: tuple, area_rule: bool) -> SimpleNamespace:
+        """
+        @brief: tap above (sign 1) or below (sign -1) the device
+        @param: sign -> direction of the tap from the device
+        @param: df_bound -> x0, x1, y0, y1 of the diffusion of the device
+        @param: area_rule -> apply the minimum implant area rule (no right or left tap to join)
+        @return: bounds (x0, x1, y0, y1) of the implant, diffusion and metal1, and the contacts of the tap
+        """
+        k = 1 if sign > 0 else 0        # index of the implant edge facing the tap
+        df_x0, df_x1, df_y0, df_y1 = df_bound
+
+        # implant shape, the inner edge faces the device and the outer edge grows away from it
+        tim_x0 = df_x0 - self.tim_enc_tdf
+        tim_x1 = df_x1 + self.tim_enc_tdf
+        tim_in = self.group.shape[self.im][0].y[k] + sign*self.tap_dist
+        tim_out = tim_in + sign*self.tim_tap_span
+
+        # minimum implant width rule
+        if sign*(tim_out - tim_in) < self.im_wid:
+            # scale the outer edge
+            tim_out = self._snap(tim_in + sign*self.im_wid)
+
+        # minimum implant area rule
+        if area_rule and sign*(tim_out - tim_in) * (tim_x1 - tim_x0) < self.tim_area:
+            # scale the outer edge only
+            tim_out = self._snap(tim_in + sign*(self.tim_area / (tim_x1 - tim_x0)))
+
+        tim_y0, tim_y1 = (tim_in, tim_out) if sign > 0 else (tim_out, tim_in)
+
+        # diffusion shape
+        tdf_x0 = df_x0
+        tdf_x1 = df_x1
+        tdf_y0 = tim_y0 + self.tim_enc_tdf
+        tdf_y1 = tim_y1 - self.tim_enc_tdf
+
+        # contact array
+        tdf_enc_tco_y = ((tdf_y1 - tdf_y0) - self.co_sz) / 2
+
+        tco_y0 = tdf_y0 + tdf_enc_tco_y
+        tco_y1 = tdf_y1 - tdf_enc_tco_y
+        tco_shape, tco_x0, tco_x1 = self._contact_row(tdf_x0, tdf_x1, tco_y0, tco_y1, self.tdf_enc_tco)
+
+        # metal1 shape
+        m1_x0 = tco_x0 - self.m1_enc_coe
+        m1_x1 = tco_x1 + self.m1_enc_coe
+        m1_y0 = tco_y0 - self.m1_enc_co
+        m1_y1 = tco_y1 + self.m1_enc_co
+
+        return SimpleNamespace(tim=[tim_x0, tim_x1, tim_y0, tim_y1],
+                               tdf=[tdf_x0, tdf_x1, tdf_y0, tdf_y1],
+                               tco=tco_shape,
+                               m1=[m1_x0, m1_x1, m1_y0, m1_y1])
+
+
+    def _create_vertical_tap(self, sign: int, df_bound: tuple, joined: list) -> SimpleNamespace:
+        """
+        @brief: tap on the right (sign 1) or left (sign -1) of the device
+        @param: sign -> direction of the tap from the device
+        @param: df_bound -> x0, x1, y0, y1 of the diffusion of the device
+        @param: joined -> top and bottom taps, their bounds are stretched to the outer edge of this tap
+        @return: bounds (x0, x1, y0, y1) of the implant, diffusion and metal1, and the contacts of the tap
+        """
+        k = 1 if sign > 0 else 0        # index of the implant edge facing the tap
+        df_x0, df_x1, df_y0, df_y1 = df_bound
+
+        # implant shape, the inner edge faces the device and the outer edge grows away from it
+        tim_y0 = df_y0 - self.tim_enc_tdf
+        tim_y1 = df_y1 + self.tim_enc_tdf
+        tim_in = self.group.shape[self.im][0].x[k] + sign*self.tap_dist
+        tim_out = tim_in + sign*self.tim_tap_span
+
+        # minimum implant width rule
+        if sign*(tim_out - tim_in) < self.im_wid:
+            # scale the outer edge
+            tim_out = self._snap(tim_in + sign*self.im_wid)
+
+        # minimum implant area rule (a joined tap takes the extent of the top and bottom taps instead)
+        if not joined and sign*(tim_out - tim_in) * (tim_y1 - tim_y0) < self.tim_area:
+            # scale the outer edge only
+            tim_out = self._snap(tim_in + sign*(self.tim_area / (tim_y1 - tim_y0)))
+
+        tim_x0, tim_x1 = (tim_in, tim_out) if sign > 0 else (tim_out, tim_in)
+
+        # diffusion shape
+        tdf_x0 = tim_x0 + self.tim_enc_tdf
+        tdf_x1 = tim_x1 - self.tim_enc_tdf
+        tdf_y0 = df_y0
+        tdf_y1 = df_y1
+
+        # contact column, centered in the diffusion
+        tdf_enc_tco_x = ((tdf_x1 - tdf_x0) - self.co_sz) / 2
+
+        tco_x0 = tdf_x0 + tdf_enc_tco_x
+        tco_x1 = tdf_x1 - tdf_enc_tco_x
+
+        # metal1 shape (the vertical extent follows the contacts and the joined taps)
+        m1_x0 = tco_x0 - self.m1_enc_co
+        m1_x1 = tco_x1 + self.m1_enc_co
+        m1_y0 = inf
+        m1_y1 = -inf
+
+        # join the top and bottom taps in one pass, the horizontal bounds of this tap are final
+        for tap in joined:
+            # update previous shapes: follow right/left tap
+            tap.tim[k] = tim_out
+            tap.tdf[k] = (tdf_x0, tdf_x1)[k]
+            tap.m1[k] = (m1_x0, m1_x1)[k]       # the pin follows the metal1 shape
+
+            # update current shapes: follow bottom and top tap
+            if tap.tim[3] < tim_y0:
+                tim_y0 = tap.tim[3]
+            if tap.tim[2] > tim_y1:
+                tim_y1 = tap.tim[2]
+
+            if tap.tdf[3] < tdf_y0:
+                tdf_y0 = tap.tdf[3]
+            if tap.tdf[2] > tdf_y1:
+                tdf_y1 = tap.tdf[2]
+
+            if tap.m1[3] < m1_y0:
+                m1_y0 = tap.m1[3]
+            if tap.m1[2] > m1_y1:
+                m1_y1 = tap.m1[2]
+
+        # contact array
+        tco_shape, tco_y0, tco_y1 = self._contact_column(tco_x0, tco_x1, tdf_y0, tdf_y1, self.tdf_enc_tco)
+
+        m1_y0 = min(m1_y0, tco_y0 - self.m1_enc_coe)
+        m1_y1 = max(m1_y1, tco_y1 + self.m1_enc_coe)
+
+        return SimpleNamespace(tim=[tim_x0, tim_x1, tim_y0, tim_y1],
+                               tdf=[tdf_x0, tdf_x1, tdf_y0, tdf_y1],
+                               tco=tco_shape,
+                               m1=[m1_x0, m1_x1, m1_y0, m1_y1])
 
 
     def create_boundary(self) -> None:
         # get the boundary based on the implant layer
-        br_x0, br_x1, br_y0, br_y1 = self.merge_shape(self.group.shape[self.im] + self.group.shape[self.tim])
+        br_x0, br_x1, br_y0, br_y1 = self.merge_shape(self.group.shape.get(self.im, []), self.group.shape.get(self.tim, []))
 
         # increase the boundary size
         size_incr = 0.5
@@ -775,20 +702,22 @@ class MOSFET:
         br_y0 -= size_incr
         br_y1 += size_incr
 
-        # shift all the shape to the origin
-        for layer in self.group.shape:
-            for shape in self.group.shape[layer]:
-                shape.x[0] -= br_x0
-                shape.x[1] -= br_x0
-                shape.y[0] -= br_y0
-                shape.y[1] -= br_y0
+        # shift all the shape to the origin (one pass over the coordinate lists of each box)
+        for shapes in self.group.shape.values():
+            for shape in shapes:
+                x, y = shape.x, shape.y
+                x[0] -= br_x0
+                x[1] -= br_x0
+                y[0] -= br_y0
+                y[1] -= br_y0
     
         # shift all the pin to the origin
         for pin in self.group.pin:
-            pin.pt1[0] -= br_x0
-            pin.pt2[0] -= br_x0
-            pin.pt1[1] -= br_y0
-            pin.pt2[1] -= br_y0
+            pt1, pt2 = pin.pt1, pin.pt2
+            pt1[0] -= br_x0
+            pt2[0] -= br_x0
+            pt1[1] -= br_y0
+            pt2[1] -= br_y0
         
         # shift the boundary to the origin
         br_x1 -= br_x0
@@ -828,12 +757,41 @@ class SUBCKT:
         self.group.shape["inst"] = [SRef(subckt_name, [0, 0])]
 
         # create pin
+        ports = self.circuit[subckt_name].port
         for pin in subckt.node:
-            for layer in self.circuit[subckt_name].port[pin].shape:
-                port_shapes = self.circuit[subckt_name].port[pin].shape[layer]
+            # the net and the port are the same for all the shapes of the pin
+            net = subckt.node[pin].net
+            for layer, port_shapes in ports[pin].shape.items():
+                # only the boxes of the port become pins
+                self.group.pin += [Pin(net, layer, [shape.x[0], shape.y[0]], [shape.x[1], shape.y[1]])
+                                   for shape in port_shapes if isinstance(shape, Box)]
+
 
-                for shape in port_shapes:
-                    if isinstance(shape, Box):
-                        net = subckt.node[pin].net
-                        self.group.pin.append(Pin(net, layer, [shape.x[0], shape.y[0]], [shape.x[1], shape.y[1]]))
+def _pack_contacts(span: float, enc: float, co_sz: float, co_spc_co: float) -> tuple:
+    """
+    @brief: number of contacts fitting in a span and their enclosure when centered (floats only)
+    @param: span -> length of the enclosing shape
+    @param: enc -> minimum enclosure of the contact
+    @param: co_sz, co_spc_co -> contact size and contact to contact spacing
+    """
+    # the epsilon only absorbs float drift on a span sitting exactly on a pitch multiple
+    num_co = int((span - enc * 2 - co_sz)/(co_sz + co_spc_co) + 1e-9) + 1      # number of contact
+    enc_co = (span - (num_co * co_sz) - ((num_co-1) * co_spc_co)) / 2           # enclosure contact based on the span
+
+    return num_co, enc_co
+
+
+@lru_cache(maxsize=1024)
+def _contact_coords(start: float, end: float, enc: float, co_sz: float, co_spc_co: float) -> tuple:
+    """
+    @brief: starting coordinates of the contacts centered between start and end (floats only)
+            (cached, the diffusion columns of a row share the same vertical span)
+    @param: start, end -> span of the enclosing shape
+    @param: enc -> minimum enclosure of the contact
+    @param: co_sz, co_spc_co -> contact size and contact to contact spacing
+    """
+    co_pitch = co_sz + co_spc_co
+    num_co, enc_co = _pack_contacts(end - start, enc, co_sz, co_spc_co)
 
+    base = start + enc_co
+    return tuple(base + i*co_pitch for i in range(num_co))
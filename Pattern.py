@@ -1,22 +1,11 @@
-import operator
-
 def simple_1d_clustered_pattern(inst: list) -> list:
     """
     @brief: simple 1D clustered pattern
     @param: inst -> instance list (e.g. [1, 2, 3]: one 0, two 1, three 2)
     @return: pattern -> pattern list (e.g. [0, 1, 1, 2, 2, 2])
     """
-    pattern = []
-
-    # convert the instances number to a dictionary
-    counts = dict(enumerate(inst))
-
-    # create the pattern
-    for i in counts:
-        for _ in range(counts[i]):
-            pattern.append(i)
-    
-    return pattern
+    # repeat each instance by its count
+    return [i for i, count in enumerate(inst) for _ in range(count)]
 
 
 def simple_1d_interdigitated_pattern(inst: list) -> list:
@@ -25,27 +14,12 @@ def simple_1d_interdigitated_pattern(inst: list) -> list:
     @param: inst -> instance list (e.g. [1, 2, 3]: one 0, two 1, three 2)
     @return: pattern -> pattern list (e.g. [0, 1, 2, 1, 2, 2])
     """
-    pattern = []
-
-    # convert the instances number to a dictionary
-    counts = dict(enumerate(inst))
-
     # find the maximum count
     max_count = max(inst)
 
     # create the interdigitated pattern
-    # loop through the maximum count
-    for _ in range(max_count):
-
-         # loop through the instance
-        for num in counts:
-
-            # check the instance count
-            if counts[num] > 0:
-                pattern.append(num)
-                counts[num] -= 1
-
-    return pattern    
+    # round r takes every instance with more than r counts
+    return [num for r in range(max_count) for num in range(len(inst)) if inst[num] > r]
 
 
 def sorted_1d_interdigitated_pattern(inst: list) -> list:
@@ -54,30 +28,15 @@ def sorted_1d_interdigitated_pattern(inst: list) -> list:
     @param: inst -> instance list (e.g. [1, 2, 3]: one 0, two 1, three 2)
     @return: pattern -> pattern list (e.g. [2, 1, 0, 2, 1, 2])
     """
-    pattern = []
-
-    # convert the instances number to a dictionary
-    counts = dict(enumerate(inst))
-
-    # sort the dictionary by the value
-    counts = dict(sorted(counts.items(), key=operator.itemgetter(1), reverse=True))
+    # sort the instances by the count (stable, equal counts keep their order)
+    order = sorted(range(len(inst)), key=inst.__getitem__, reverse=True)
 
     # find the maximum count
     max_count = max(inst)
 
     # create the interdigitated pattern
-    # loop through the maximum count
-    for _ in range(max_count):
-
-         # loop through the instance
-        for num in counts:
-
-            # check the instance count
-            if counts[num] > 0:
-                pattern.append(num)
-                counts[num] -= 1
-
-    return pattern
+    # round r takes every instance with more than r counts
+    return [num for r in range(max_count) for num in order if inst[num] > r]
 
 
 def balanced_1d_interdigitated_pattern(inst: list) -> list:
@@ -88,23 +47,16 @@ def balanced_1d_interdigitated_pattern(inst: list) -> list:
     """
     pattern = []
 
-    # convert the instances number to a dictionary
-    counts = dict(enumerate(inst))
-
-    # sort the dictionary by the value
-    counts = dict(sorted(counts.items(), key=operator.itemgetter(1), reverse=True))
+    # sort the instances by the count (stable, equal counts keep their order)
+    order = sorted(range(len(inst)), key=inst.__getitem__, reverse=True)
 
     # calculate the interdigitated occurrence = previous num / current num
-    occur = []
-    prev = 0
-    for i, num in enumerate(counts):
-        if i != 0:
-            occur.append(round(prev / counts[num]))
-
-        prev = counts[num]
-
+    occur = [round(inst[prev] / inst[num]) for prev, num in zip(order, order[1:])]
     occur.append(1)
 
+    # remaining count of each instance, in the sorted order
+    remaining = [inst[num] for num in order]
+
     # find the maximum count
     max_count = max(inst)
 
@@ -113,15 +65,13 @@ def balanced_1d_interdigitated_pattern(inst: list) -> list:
     for _ in range(max_count):
 
          # loop through the instance
-        for i, num in enumerate(counts):
-
-            # occurrence dependency
-            for _ in range(occur[i]):
+        for i, num in enumerate(order):
 
-                # check the instance count
-                if counts[num] > 0:
-                    pattern.append(num)
-                    counts[num] -= 1
+            # occurrence dependency, bounded by the instance count left
+            take = min(occur[i], remaining[i])
+            if take > 0:
+                pattern.extend([num] * take)
+                remaining[i] -= take
 
     return pattern
 
@@ -132,46 +82,14 @@ def simple_1d_common_centroid_pattern(inst: list) -> list:
     @param: inst -> instance list (e.g. [1, 2, 3]: one 0, two 1, three 2)
     @return: pattern -> pattern list (e.g. [1, 2, 0, 2, 2, 1])
     """
-    pattern = []
-    left_pattern = []
-    right_pattern = []
-    
-    # convert the instances number to a dictionary
-    counts = dict(enumerate(inst))
-    odd_counts = {}
-
-    # get the odd number instance
-    for i in counts:
-        if counts[i] % 2 != 0:
-            # Method 1:
-            # odd_counts[i] = counts[i]   # get the odd instances from the counts
-            # counts[i] = 0               # remove all the odd instances from the counts
-
-            # Method 2:
-            odd_counts[i] = 1           # get one count for the odd instances
-            counts[i] -= 1              # minus one from the counts
-
-    # create the left and right pattern based on the even instances
-    post = "left"
-    for i in counts:
-        for _ in range(counts[i]):
-            if post == "left":
-                left_pattern.append(i)
-                post = "right"
-            else:
-                right_pattern.append(i)
-                post = "left"
-
-    # add the odd instances to the left and right pattern
-    post = "left"
-    for i in odd_counts:
-        for _ in range(odd_counts[i]):
-            if post == "left":
-                left_pattern.append(i)
-                post = "right"
-            else:
-                right_pattern.append(i)
-                post = "left"
+    # the even counts of the instances first, then one count for each odd instance
+    even = [i for i, count in enumerate(inst) for _ in range(count - count % 2)]
+    odd = [i for i, count in enumerate(inst) if count % 2 != 0]
+    placed = even + odd
+
+    # alternate the instances between the left and right pattern (the even part has an even length)
+    left_pattern = placed[0::2]
+    right_pattern = placed[1::2]
 
     # create the pattern by combining the left and right (reversed) pattern
     pattern = left_pattern + right_pattern[::-1]
@@ -187,31 +105,21 @@ def simple_2d_clustered_pattern(inst: list, row: int) -> list:
     @return: pattern -> pattern list (e.g. [0, 1, 1, 2, 2, 2])
     """
     pattern = []
-
-    # convert the instances number to a dictionary
-    counts = dict(enumerate(inst))
+    total = sum(inst)
 
     # get dummy instance
-    dummy = row - (sum(inst) % row) if sum(inst) % row != 0 else 0
+    dummy = row - (total % row) if total % row != 0 else 0
 
-    # insert the dummy instance
-    counts["d"] = dummy
-
-    # create 1d pattern from the instance
-    pattern_1d = []
-    for i in counts:
-        for _ in range(counts[i]):
-            pattern_1d.append(i)
+    # create 1d pattern from the instance, followed by the dummy instance
+    pattern_1d = [i for i, count in enumerate(inst) for _ in range(count)]
+    pattern_1d += ["d"] * dummy
 
     # get column number
-    col = sum(inst) // row + 1 if dummy > 0 else sum(inst) // row
-
-    # create 2d pattern from 1d pattern, row and column
-    for _ in range(row):
-        tmp = []
-        for _ in range(col):
-            tmp.append(pattern_1d.pop(0))
-        pattern.append(tmp)
+    col = total // row + 1 if dummy > 0 else total // row
+
+    # create 2d pattern from 1d pattern, row and column (each row is the next col instances)
+    for r in range(row):
+        pattern.append(pattern_1d[r*col:(r+1)*col])
     
     return pattern
 
@@ -225,9 +133,6 @@ def custom_2d_pattern(inst: str) -> list:
     pattern = []
     row_inst = inst.strip("][").split(",")
     for i in row_inst:
-        tmp = []
-        for num in i:
-            tmp.append(int(num)) if num != "d" else tmp.append('d')
-        pattern.append(tmp)
+        pattern.append([int(num) if num != "d" else 'd' for num in i])
 
     return pattern
\ No newline at end of file
@@ -2,11 +2,61 @@ from Module.DB import *
 from Device_Generator import Pattern
 from Device_Generator.EulerGraph import *
 from Device_Generator.Fleury_Algorithm import *
-from engineering_notation import EngNumber as eng
+from decimal import Decimal
 import re
 
+# engineering notation suffix -> power of ten
+_SUFFIX = {"a": -18, "f": -15, "p": -12, "n": -9, "u": -6, "m": -3, "k": 3, "M": 6, "G": 9, "T": 12}
+
+# number and optional suffix of an engineering notation value, e.g. "0.15u", "350n", "2e-6", "0.15um"
+_ENG_RE = re.compile(r"\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)([a-zA-Z]*)\s*")
+
+# custom pattern constraint, e.g. "[01,10]"
+_PAT_BRACKET = re.compile(r"\[.+\]")
+
+def parse_eng(value: str) -> Decimal:
+    """
+    @brief: parse an engineering notation value
+    @param value: engineering notation value (a trailing meter unit such as in "0.15um" is accepted)
+    @return: the value as an exact decimal
+    """
+    match = _ENG_RE.fullmatch(str(value))
+    if match is None:
+        raise ValueError(f"Invalid engineering notation: {value!r}")
+
+    # an unknown suffix is an error rather than no multiplier, e.g. "0.15U", "2x" or "1meg"
+    number, suffix = match.groups()
+    if not suffix:
+        exponent = 0
+    elif suffix[0] in _SUFFIX and suffix[1:] in ("", "m"):
+        exponent = _SUFFIX[suffix[0]]
+    else:
+        raise ValueError(f"Invalid engineering notation suffix: {value!r}")
+
+    return Decimal(number).scaleb(exponent)
+
+
+def count_state(counts: list) -> str:
+    """
+    @brief: classify the finger or multiplier numbers of a group
+    @param counts: number of each instance
+    @return: "invalid" if any number is less than 1, "one" if all the numbers are 1,
+             "same" if all the numbers are equal, "mixed" otherwise
+    """
+    low, high = min(counts), max(counts)
+    if low < 1:
+        return "invalid"
+    elif high == 1:
+        return "one"
+    elif low == high:
+        return "same"
+    else:
+        return "mixed"
+
 
 class MOSFET_Node:
+    __slots__ = ("type", "net", "length", "width")
+
     def __init__(self, type: str, net: str, length: float, width: float) -> None:
         self.type = type
         self.net = net
@@ -17,6 +67,14 @@ class MOSFET:
     """
     MOSFET Group Instance: Topology Generation
     """
+    # (multiplier state, finger state) -> topology condition, see get_topology_condition
+    TOPOLOGY_CONDITION = {
+        ("one", "one"): 0,      ("one", "same"): 0,     ("one", "mixed"): 0,    ("one", "invalid"): 0,
+        ("same", "one"): 1,     ("same", "same"): 2,    ("same", "mixed"): 2,   ("same", "invalid"): 3,
+        ("mixed", "one"): 1,    ("mixed", "same"): 3,   ("mixed", "mixed"): 3,  ("mixed", "invalid"): 3,
+        ("invalid", "one"): 3,  ("invalid", "same"): 3, ("invalid", "mixed"): 3, ("invalid", "invalid"): 3,
+    }
+
     def __init__(self, tech: Tech, circuit: Circuit, group: Group) -> None:
         self.circuit = circuit
         self.group = group
@@ -27,6 +85,8 @@ class MOSFET:
         # MOSFET Parameters
         self.all_finger = []
         self.all_multiplier  = []
+        self.all_length = []    # in database unit
+        self.all_width  = []    # in database unit, per finger
 
         # MOSFET Topology generation
         self.update_info()
@@ -37,6 +97,9 @@ class MOSFET:
         """
         Update MOSFET Group Instance Information
         """
+        # decimal database unit, so "0.15u" in 1e-6 units is exactly 0.15
+        db_unit = Decimal(str(self.db_unit))
+
         for inst in self.group.inst:
             # get the finger and multiplier value
             inst.param["finger"]     = int(inst.param["finger"])
@@ -46,9 +109,17 @@ class MOSFET:
             self.all_finger.append(inst.param["finger"])
             self.all_multiplier.append(inst.param["multiplier"])
 
-            # update length and width 
-            inst.param["length"] = eng(inst.param["length"])
-            inst.param["width"] = eng(inst.param["width"])
+            # parse the length and width once (in meter)
+            length = parse_eng(inst.param["length"])
+            width  = parse_eng(inst.param["width"])
+
+            # get the length and width in database unit
+            self.all_length.append(float(length / db_unit))
+            self.all_width.append(float(width / db_unit) / inst.param["finger"])
+
+            # update length and width as plain numbers (in meter)
+            inst.param["length"] = float(length)
+            inst.param["width"]  = float(width)
 
 
     def generate_topology(self) -> None:
@@ -76,7 +147,7 @@ class MOSFET:
         self.group.topology = nodelist
     
 
-    def get_topology_condition(self) -> bool:
+    def get_topology_condition(self) -> int:
         """
         Check the MOSFET Group Condition
         return different conditions to determine different topology
@@ -96,52 +167,8 @@ class MOSFET:
             Else
                 Error -> condition 3
         """
-        # only one multiplier number (all same multiplier number)
-        if len(set(self.all_multiplier)) == 1:
-            # and the multiplier number is 1, mf topology only, no matter how many fingers
-            if self.all_multiplier[0] == 1:
-                return 0
-            # and the multiplier number is greater than 1
-            elif self.all_multiplier[0] > 1:
-                # only one finger number (all same finger number)
-                if (len(set(self.all_finger)) == 1):
-                    # and the finger number is 1, mp topology only
-                    if self.all_finger[0] == 1:
-                        return 1
-                    # and the finger number is greater than 1, mf & mp topology
-                    elif self.all_finger[0] > 1:
-                        return 2
-                    # and the finger number is less than 1, error
-                    elif self.all_finger[0] < 1:
-                        return 3
-            
-                # more than one finger number
-                elif len(set(self.all_finger)) > 1:
-                    for i in set(self.all_finger):
-                        # any finger number is greater than 1, mf & mp topology
-                        if i > 1:
-                            return 2
-                        # any finger number is less than 1, error
-                        elif i < 1:
-                            return 3
-            
-            # and the multiplier number is less than 1, error
-            elif self.all_multiplier[0] < 1:
-                return 3
-            
-        # more than one multiplier number
-        elif len(set(self.all_multiplier)) > 1:
-            for i in set(self.all_multiplier):
-                # any multiplier number is greater than 1
-                if i > 1:
-                    # only one finger number, and the finger number is 1, mp topology only
-                    if len(set(self.all_finger)) == 1 and self.all_finger[0] == 1:
-                        return 1
-                
-                elif i < 1:
-                    return 3
-
-            return 3
+        # the condition only depends on the state of each number list
+        return MOSFET.TOPOLOGY_CONDITION[(count_state(self.all_multiplier), count_state(self.all_finger))]
     
 
     def get_topology_order(self, topology: str) -> list:
@@ -159,7 +186,7 @@ class MOSFET:
             elif self.group.constraint["mf_sym"] == "CC":
                 order = Pattern.simple_1d_common_centroid_pattern(self.all_finger)
 
-            elif re.match("\[.+\]",self.group.constraint["mf_sym"]) is not None:
+            elif _PAT_BRACKET.match(self.group.constraint["mf_sym"]) is not None:
                 order = Pattern.custom_2d_pattern(self.group.constraint["mf_sym"])
 
             return order
@@ -177,7 +204,7 @@ class MOSFET:
             elif self.group.constraint["mp_sym"] == "None" and self.group.constraint["mp_row"] > 1:
                 order = Pattern.simple_2d_clustered_pattern(self.all_multiplier, self.group.constraint["mp_row"])
 
-            elif re.match("\[.+\]",self.group.constraint["mp_sym"]) is not None:
+            elif _PAT_BRACKET.match(self.group.constraint["mp_sym"]) is not None:
                 order = Pattern.custom_2d_pattern(self.group.constraint["mp_sym"])
 
             return order
@@ -197,13 +224,13 @@ class MOSFET:
         # Add Edge for Multi-Finger Topology
         for i in mf_order:
             inst = self.group.inst[i]
-            length = float(inst.param["length"]/self.db_unit)
-            width = float(inst.param["width"]/self.db_unit) / inst.param["finger"]
+            length = self.all_length[i]
+            width = self.all_width[i]
 
             source = MOSFET_Node("diff", inst.node["source"].net, length, width)
             gate = MOSFET_Node("gate", inst.node["gate"].net, length, width)
             drain = MOSFET_Node("diff", inst.node["drain"].net, length, width)
-            mf_euler.add_edge(source, drain, [gate])
+            mf_euler.add_edge_pair(source, drain, [gate])
      
         # Find Euler Path
         mf_euler_path = Fleury_Algorithm(mf_euler)
@@ -230,13 +257,13 @@ class MOSFET:
             # Add Edge for Multiplier Topology
             for i in row:
                 inst = self.group.inst[i]
-                length = float(inst.param["length"]/self.db_unit)
-                width = float(inst.param["width"]/self.db_unit) / inst.param["finger"]
+                length = self.all_length[i]
+                width = self.all_width[i]
 
                 source = MOSFET_Node("diff", inst.node["source"].net, length, width)
                 gate = MOSFET_Node("gate", inst.node["gate"].net, length, width)
                 drain = MOSFET_Node("diff", inst.node["drain"].net, length, width)
-                mp_euler.add_edge(source, drain, [gate])
+                mp_euler.add_edge_pair(source, drain, [gate])
 
             # Find Euler Path
             mp_euler_path = Fleury_Algorithm(mp_euler)
@@ -256,23 +283,25 @@ class MOSFET:
         # Generate Multi-Finger Topology
         mf_nodelist = self.generate_multi_finger_topology()
 
-        # Create Eulerian Graph for multiplier order
-        for _ in range(self.group.constraint["mp_row"]):
-            # Create Eulerian Graph
-            mp_euler = EulerGraph()     # NOTE: Change Different Edge adding can get different Initial node 
+        # the multi-finger row is an edge of the multiplier graph
+        fir = mf_nodelist[0][0]         # first node
+        mid = mf_nodelist[0][1:-1]      # middle nodes
+        lst = mf_nodelist[0][-1]        # last node
 
-            # Add Edge for Multiplier Topology
-            for _ in range(self.all_multiplier[0]//self.group.constraint["mp_row"]):
-                fir = mf_nodelist[0][0]         # first node
-                mid = mf_nodelist[0][1:-1]      # middle nodes
-                lst = mf_nodelist[0][-1]        # last node
-                mp_euler.add_edge(fir, lst, mid)
+        # Create Eulerian Graph
+        mp_euler = EulerGraph()     # NOTE: Change Different Edge adding can get different Initial node 
 
-            # Find Euler Path
-            mp_euler_path = Fleury_Algorithm(mp_euler)
-            rowlist = mp_euler_path.fleury_algorithm(finger=False)
+        # Add Edge for Multiplier Topology
+        for _ in range(self.all_multiplier[0]//self.group.constraint["mp_row"]):
+            mp_euler.add_edge_pair(fir, lst, mid)
 
-            nodelist.append(rowlist)
+        # Find Euler Path
+        mp_euler_path = Fleury_Algorithm(mp_euler)
+        rowlist = mp_euler_path.fleury_algorithm(finger=False)
+
+        # every row has the same graph, so the rows are copies of the same path
+        for _ in range(self.group.constraint["mp_row"]):
+            nodelist.append(list(rowlist))
 
         return nodelist
 